@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+import matplotlib
+from PyQt5.QtWidgets import QWidget, QRubberBand
+from PyQt5.QtCore import Qt, QRect, QRectF, QSize
+from PyQt5.QtGui import QImage, QPainter
+
+LUT_SIZE = 256
+TITLE_HEIGHT = 20
+
+_lut_cache = {}
+
+
+def colormap_lut(name):
+    """256-entry RGBA uint8 lookup table for a matplotlib colormap."""
+    if name not in _lut_cache:
+        cmap = matplotlib.colormaps[name].resampled(LUT_SIZE)
+        _lut_cache[name] = cmap(np.arange(LUT_SIZE), bytes=True)
+    return _lut_cache[name]
+
+
+def apply_lut(data, vmin, vmax, lut, out=None):
+    """Clip data to [vmin, vmax] and map it through lut into an (h, w, 4) uint8 array.
+
+    Index rounding matches matplotlib's Normalize + Colormap, so the result
+    is the same image imshow would produce. NaN samples come out fully
+    transparent, like imshow's default "bad" colour.
+    """
+    n = len(lut)
+    scale = n / (vmax - vmin) if vmax > vmin else 0.0
+    idx = (data - vmin) * scale
+    bad = np.isnan(idx)
+    has_bad = bad.any()
+    if has_bad:
+        idx[bad] = 0
+    np.clip(idx, 0, n - 1, out=idx)
+    out = np.take(lut, idx.astype(np.intp), axis=0, out=out, mode='clip')
+    if has_bad:
+        out[bad] = 0
+    return out
+
+
+class RasterPanel(QWidget):
+    """One image panel drawn straight from an RGBA buffer via QImage.
+
+    Limits follow matplotlib's imshow conventions (xlim = (left, right),
+    ylim = (bottom, top) with pixel centres on integers), so zoom state can
+    be passed back and forth with the matplotlib axes.
+    """
+
+    def __init__(self, on_zoom, on_reset, parent=None):
+        super().__init__(parent)
+        self.on_zoom = on_zoom
+        self.on_reset = on_reset
+        self.title = ""
+        self.xlim = None
+        self.ylim = None
+        self._buf = None
+        self._image = None
+        self._corner = None
+        self._origin = None
+        self._rubber_band = QRubberBand(QRubberBand.Rectangle, self)
+        self.setMinimumSize(QSize(100, 100))
+
+    def image_rect(self):
+        return self.rect().adjusted(0, TITLE_HEIGHT, 0, 0)
+
+    def clear(self, title):
+        self.title = title
+        self._image = None
+        self.update()
+
+    def set_image(self, data, vmin, vmax, lut, xlim, ylim, title, subtract=None):
+        """Render data (rows = samples, columns = traces) within xlim/ylim.
+
+        If subtract is given, data - subtract is shown; the difference is only
+        computed for the visible window.
+        """
+        self.title = title
+        self.xlim, self.ylim = xlim, ylim
+        x0, x1 = sorted(xlim)
+        y0, y1 = sorted(ylim)
+        rows, cols = data.shape
+        c0, c1 = max(0, math.floor(x0 + 0.5)), min(cols, math.ceil(x1 + 0.5))
+        r0, r1 = max(0, math.floor(y0 + 0.5)), min(rows, math.ceil(y1 + 0.5))
+        if c1 <= c0 or r1 <= r0:
+            self.clear(title)
+            return
+        window = data[r0:r1, c0:c1]
+        if subtract is not None:
+            window = window - subtract[r0:r1, c0:c1]
+        h, w = window.shape
+        if self._buf is None or self._buf.shape[:2] != (h, w):
+            self._buf = np.empty((h, w, 4), dtype=np.uint8)
+        apply_lut(window, vmin, vmax, lut, out=self._buf)
+        # QImage wraps self._buf without copying
+        self._image = QImage(self._buf.data, w, h, 4 * w, QImage.Format_RGBA8888)
+        self._corner = (c0, r0)
+        self.update()
+
+    def target_rect(self):
+        c0, r0 = self._corner
+        h, w = self._buf.shape[:2]
+        left, top = self.to_widget(c0 - 0.5, r0 - 0.5)
+        right, bottom = self.to_widget(c0 + w - 0.5, r0 + h - 0.5)
+        return QRectF(left, top, right - left, bottom - top)
+
+    def view_spans(self):
+        # (x0, y0, width, height) of the view, zero spans replaced by 1
+        x0, x1 = sorted(self.xlim)
+        y0, y1 = sorted(self.ylim)
+        return x0, y0, (x1 - x0) or 1.0, (y1 - y0) or 1.0
+
+    def to_widget(self, x, y):
+        rect = self.image_rect()
+        x0, y0, dx, dy = self.view_spans()
+        return (rect.left() + (x - x0) / dx * rect.width(),
+                rect.top() + (y - y0) / dy * rect.height())
+
+    def to_data(self, pos):
+        rect = self.image_rect()
+        x0, y0, dx, dy = self.view_spans()
+        return (x0 + (pos.x() - rect.left()) / max(rect.width(), 1) * dx,
+                y0 + (pos.y() - rect.top()) / max(rect.height(), 1) * dy)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        painter.drawText(QRect(0, 0, self.width(), TITLE_HEIGHT), Qt.AlignCenter, self.title)
+        if self._image is not None:
+            painter.setClipRect(self.image_rect())
+            painter.drawImage(self.target_rect(), self._image)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self._image is not None \
+                and self.image_rect().contains(event.pos()):
+            self._origin = event.pos()
+            self._rubber_band.setGeometry(QRect(self._origin, QSize()))
+            self._rubber_band.show()
+
+    def mouseMoveEvent(self, event):
+        if self._origin is not None:
+            self._rubber_band.setGeometry(QRect(self._origin, event.pos()).normalized())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self._origin is not None:
+            self._rubber_band.hide()
+            origin, self._origin = self._origin, None
+            x_a, y_a = self.to_data(origin)
+            x_b, y_b = self.to_data(event.pos())
+            # Ignore clicks and drags narrower than one sample either way
+            if abs(x_b - x_a) < 1 or abs(y_b - y_a) < 1:
+                return
+            self.on_zoom((min(x_a, x_b), max(x_a, x_b)), (max(y_a, y_b), min(y_a, y_b)))
+        elif event.button() == Qt.RightButton:
+            self.on_reset()
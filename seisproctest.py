@@ -1,6 +1,5 @@
 import shutil
 import json
-import importlib
 import numpy as np
 import segyio
 import matplotlib.pyplot as plt
@@ -8,6 +7,7 @@ import matplotlib
 import imageio
 import os
 import tempfile
+import time
 matplotlib.use('Qt5Agg')
 
 from matplotlib.patches import Rectangle
@@ -17,10 +17,15 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QLabel, QVBoxLayout, QWidget,
     QComboBox, QHBoxLayout, QAction, QProgressBar, QSpinBox, QMessageBox,
-    QPushButton, QSizePolicy, QDialog, QTextEdit, QDialogButtonBox, QInputDialog
+    QPushButton, QSizePolicy, QDialog, QTextEdit, QDialogButtonBox, QInputDialog,
+    QListWidget, QListWidgetItem
 )
 from PyQt5.QtCore import Qt
 from about import *
+from worker import load_method, run_variant, run_jobs, VariantJob, MEMORY_LIMIT_SUPPORTED
+from fastview import RasterPanel, colormap_lut
+from session import (SESSION_SUFFIX, SESSION_FILTER, Session, LazyVariants, create_session,
+                     append_variant, append_view, variant_metrics)
 from PyQt5.QtGui import QScreen
 
 class ParamEditDialog(QDialog):
@@ -66,6 +71,33 @@ class ParamEditDialog(QDialog):
         self.json_text = text
         self.accept()
 
+class VariantSelectDialog(QDialog):
+    def __init__(self, labels, checked, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Select Parameter Sets")
+        self.resize(600, 400)
+
+        self.list_widget = QListWidget()
+        for i, label in enumerate(labels):
+            item = QListWidgetItem(label)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked if i in checked else Qt.Unchecked)
+            self.list_widget.addItem(item)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Each file is read once and processed with every checked set:"))
+        layout.addWidget(self.list_widget)
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def selected(self):
+        return [i for i in range(self.list_widget.count())
+                if self.list_widget.item(i).checkState() == Qt.Checked]
+
 class SeisProcTester(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -88,6 +120,21 @@ class SeisProcTester(QMainWindow):
         self.current_index = 0
         self.last_opened_file = None
         self.scaler = None
+        self.variant_errors = {}
+        self.variant_info = []
+        self.params_text = ""
+
+        # Set while a sweep or folder run is in progress
+        self.busy = False
+        self._clip_cache = {}
+
+        # Session file the results are read from / streamed to
+        self.session = None
+        self.stream_session_path = None
+
+        # Per-variant resource limits (0 = unlimited)
+        self.variant_timeout = 0
+        self.variant_mem_limit = 0
 
         # Parameter edit dialog
         self.params_path = None
@@ -98,6 +145,16 @@ class SeisProcTester(QMainWindow):
         self.ax = [self.figure.add_subplot(1, 3, i+1) for i in range(3)]
         self.canvas = FigureCanvas(self.figure)
 
+        # Fast display: LUT-mapped rasters drawn directly through QImage
+        self.fast_display = False
+        self.fast_panels = [RasterPanel(self.on_fast_zoom, self.on_fast_reset) for _ in range(3)]
+        self.fast_view = QWidget()
+        fast_layout = QHBoxLayout()
+        for panel in self.fast_panels:
+            fast_layout.addWidget(panel)
+        self.fast_view.setLayout(fast_layout)
+        self.fast_view.setVisible(False)
+
         # Widgets
         self.file_label = QLabel("No file loaded")
         self.file_label.setMaximumHeight(20)
@@ -142,6 +199,7 @@ class SeisProcTester(QMainWindow):
         main_layout = QVBoxLayout()
         main_layout.addWidget(self.file_label)
         main_layout.addWidget(self.canvas, stretch=1)
+        main_layout.addWidget(self.fast_view, stretch=1)
 
         ctrl_layout = QHBoxLayout()
         ctrl_layout.addWidget(QLabel("Parameter Set:")); ctrl_layout.addWidget(self.param_combo)
@@ -170,6 +228,8 @@ class SeisProcTester(QMainWindow):
         file_menu.addAction(QAction("Open SEG-Y", self, triggered=self.open_file))
         file_menu.addAction(QAction("Save", self, triggered=self.save_segy))
         file_menu.addAction(QAction("Save Figures", self, triggered=self.save_figures))  # New menu item
+        file_menu.addAction(QAction("Open Session", self, triggered=self.open_session))
+        file_menu.addAction(QAction("Save Session", self, triggered=self.save_session))
         file_menu.addAction(QAction("Exit", self, triggered=self.close))
 
         params_menu = menubar.addMenu("Params")
@@ -180,11 +240,19 @@ class SeisProcTester(QMainWindow):
         process_menu = menubar.addMenu("Process")     
         process_menu.addAction(QAction("Run testing", self, triggered=self.process_data))
         process_menu.addAction(QAction("Apply to Folder", self, triggered=self.apply_to_folder))
+        process_menu.addAction(QAction("Resource Limits", self, triggered=self.set_resource_limits))
+        self.stream_action = QAction("Stream to Session", self, checkable=True,
+                                     toggled=self.toggle_stream_session)
+        process_menu.addAction(self.stream_action)
+
+        view_menu = menubar.addMenu("View")
+        view_menu.addAction(QAction("Fast Display", self, checkable=True, toggled=self.toggle_fast_display))
 
         help_menu = menubar.addMenu("Help")
         help_menu.addAction(QAction("About", self, triggered=self.show_about))
 
     def open_file(self):
+        if self.busy: return
         path, _ = QFileDialog.getOpenFileName(self, "Open SEG-Y File", "", "SEG-Y Files (*.sgy *.segy)")
         if not path: return
         self.last_opened_file = path
@@ -194,12 +262,136 @@ class SeisProcTester(QMainWindow):
         self.scaler = MinMaxScaler().fit(self.raw_data.reshape(-1,1))
         self.scaled_data = self.scaler.transform(self.raw_data.reshape(-1,1)).reshape(self.raw_data.shape)
         self.processed_real = None
+        self.close_session()
+        self.variant_errors = {}; self.variant_info = []
+        self._clip_cache = {}
         self.param_sets.clear(); self.param_combo.clear(); self.current_index = 0
         self.file_label.setText(f"File Loaded: {path} shape={self.raw_data.shape}")
+        self.reset_extent()
         self.update_images()
+
+    def reset_extent(self):
+        # Same limits imshow sets for the full image
+        n_traces, n_samples = self.raw_data.shape
+        self.initial_xlims = [(-0.5, n_traces - 0.5)] * 3
+        self.initial_ylims = [(n_samples - 0.5, -0.5)] * 3
+
+    def set_zoom(self, xlims, ylims):
+        self.current_xlims = [tuple(l) for l in xlims]
+        self.current_ylims = [tuple(l) for l in ylims]
         for i, ax in enumerate(self.ax):
-            self.initial_xlims[i] = ax.get_xlim()
-            self.initial_ylims[i] = ax.get_ylim()
+            ax.set_xlim(self.current_xlims[i])
+            ax.set_ylim(self.current_ylims[i])
+
+    def view_state(self):
+        if not self.fast_display:
+            for i, ax in enumerate(self.ax):
+                self.current_xlims[i] = ax.get_xlim()
+                self.current_ylims[i] = ax.get_ylim()
+        xlims = [l if l is not None else self.initial_xlims[i] for i, l in enumerate(self.current_xlims)]
+        ylims = [l if l is not None else self.initial_ylims[i] for i, l in enumerate(self.current_ylims)]
+        return {
+            'current_index': self.current_index,
+            'colormap': self.colormap_combo.currentText(),
+            'gain': self.gain_input.value(),
+            'xlims': [[float(v) for v in l] for l in xlims],
+            'ylims': [[float(v) for v in l] for l in ylims],
+        }
+
+    def close_session(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def open_session(self):
+        if self.busy: return
+        path = QFileDialog.getExistingDirectory(self, "Open Session")
+        if not path: return
+        try:
+            session = Session(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e)); return
+        try:
+            raw_data = session.load_input()
+        except Exception as e:
+            session.close()
+            QMessageBox.critical(self, "Error", str(e)); return
+        self.close_session()
+        self.session = session
+        manifest = session.manifest
+        self.last_opened_file = manifest['source']
+        self.raw_data = raw_data
+        self.scaler = MinMaxScaler().fit(self.raw_data.reshape(-1,1))
+        self.scaled_data = self.scaler.transform(self.raw_data.reshape(-1,1)).reshape(self.raw_data.shape)
+        self._clip_cache = {}
+        self.param_sets = list(manifest['param_sets'])
+        self.params_text = manifest['params']
+        self.params_dialog.load_json(path, json.loads(self.params_text))
+        self.variant_info = list(session.variants)
+        self.variant_errors = {i: info['error'] for i, info in enumerate(self.variant_info)
+                               if info['status'] != 'ok'}
+        # Variant arrays are only read from the file when displayed
+        self.processed_real = LazyVariants(session) if self.variant_info else None
+        self.reset_extent()
+
+        view = session.view
+        self.current_index = min(view.get('current_index', 0), max(len(self.variant_info) - 1, 0))
+        widgets = (self.param_combo, self.colormap_combo, self.gain_input)
+        for w in widgets:
+            w.blockSignals(True)
+        self.param_combo.clear()
+        self.param_combo.addItems([info['label'] for info in self.variant_info])
+        self.param_combo.setCurrentIndex(self.current_index)
+        if 'colormap' in view:
+            self.colormap_combo.setCurrentText(view['colormap'])
+        if 'gain' in view:
+            self.gain_input.setValue(view['gain'])
+        for w in widgets:
+            w.blockSignals(False)
+        self.set_zoom(view.get('xlims', self.initial_xlims), view.get('ylims', self.initial_ylims))
+        self.file_label.setText(f"Session Loaded: {path} shape={self.raw_data.shape}")
+        self.update_images()
+
+    def session_save_path(self, title):
+        # Sessions are directories; the name always gets the session suffix
+        path, _ = QFileDialog.getSaveFileName(self, title, "", SESSION_FILTER)
+        if path and not path.endswith(SESSION_SUFFIX):
+            path += SESSION_SUFFIX
+        return path
+
+    def save_session(self):
+        if self.busy:
+            return
+        if self.raw_data is None or self.processed_real is None:
+            QMessageBox.warning(self, "Cannot Save", "Load & process data before saving a session.")
+            return
+        path = self.session_save_path("Save Session")
+        if not path:
+            return
+        try:
+            if self.session is not None and os.path.abspath(path) == os.path.abspath(self.session.path):
+                # Results are already in this file, only the view state is new
+                append_view(path, self.view_state())
+            else:
+                create_session(path, self.raw_data, self.last_opened_file, self.params_text, self.param_sets)
+                for i, info in enumerate(self.variant_info):
+                    data = None if i in self.variant_errors else self.processed_real[i]
+                    append_variant(path, i, data, info)
+                append_view(path, self.view_state())
+        except Exception as e:
+            QMessageBox.critical(self, "Save Error", f"Error saving session:\n{str(e)}")
+            return
+        QMessageBox.information(self, "Save Successful", f"Session saved to:\n{path}")
+
+    def toggle_stream_session(self, checked):
+        if not checked:
+            self.stream_session_path = None
+            return
+        path = self.session_save_path("Stream Sweep to Session")
+        if not path:
+            self.stream_action.setChecked(False)
+            return
+        self.stream_session_path = path
 
     def show_about(self):
         about = AboutDialog(self)
@@ -235,7 +427,40 @@ class SeisProcTester(QMainWindow):
             json.dump(parsed, f, indent=2)
         QMessageBox.information(self, "Saved", f"Saved to:\n{path}")
 
+    def set_resource_limits(self):
+        timeout, ok = QInputDialog.getInt(self, "Resource Limits",
+                                          "Timeout per variant, s (0 = no limit):",
+                                          self.variant_timeout, 0, 86400)
+        if not ok:
+            return
+        self.variant_timeout = timeout
+        if not MEMORY_LIMIT_SUPPORTED:
+            QMessageBox.information(self, "Resource Limits",
+                                    "Memory limits are not supported on this platform.")
+            return
+        mem_limit, ok = QInputDialog.getInt(self, "Resource Limits",
+                                            "Extra memory per variant, MB (0 = no limit):",
+                                            self.variant_mem_limit, 0, 1024 * 1024)
+        if not ok:
+            return
+        self.variant_mem_limit = mem_limit
+
+    def set_busy(self, busy):
+        # Events keep being processed while workers run, so anything that
+        # would start another run or replace the data is locked out
+        self.busy = busy
+        self.menuBar().setEnabled(not busy)
+
     def process_data(self):
+        if self.busy:
+            return
+        self.set_busy(True)
+        try:
+            self.run_testing()
+        finally:
+            self.set_busy(False)
+
+    def run_testing(self):
         if self.scaled_data is None:
             QMessageBox.warning(self, "No Data", "Load a SEG-Y file first"); return
         text = self.params_dialog.json_text.strip()
@@ -245,7 +470,7 @@ class SeisProcTester(QMainWindow):
             raw = json.loads(text)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e)); return
-        self.param_sets.clear()
+        self.param_sets.clear(); self.variant_errors = {}
         for method, params in raw.items():
             for combo in product(*params.values()):
                 pd = dict(zip(params.keys(), combo)); pd['method'] = method
@@ -253,17 +478,26 @@ class SeisProcTester(QMainWindow):
         missing = []
         for m in {pd['method'] for pd in self.param_sets}:
             try:
-                mod, fn = m.rsplit('.', 1)
-                getattr(importlib.import_module(mod), fn)
+                load_method(m)
             except Exception:
                 missing.append(m)
         if missing:
             QMessageBox.critical(self, "Cannot import", "\n".join(missing)); return
+        self.params_text = text
+        self.processed_real = None
+        self.close_session()
+        stream = self.stream_session_path
+        if stream:
+            try:
+                create_session(stream, self.raw_data, self.last_opened_file, text, self.param_sets)
+            except Exception as e:
+                QMessageBox.critical(self, "Session Error", str(e)); return
         self.param_combo.setEnabled(False); self.progress_bar.setVisible(True); self.progress_bar.setValue(0)
         self.processing_label.setVisible(True)
         self.stop_button.setVisible(True)
         QApplication.processEvents()
-        real_list = []; self.param_combo.clear(); total=len(self.param_sets); self.processing_stopped=False
+        real_list = []; self.variant_info = []
+        self.param_combo.clear(); total=len(self.param_sets); self.processing_stopped=False
         for i, pd in enumerate(self.param_sets):
             if self.processing_stopped:
                 break
@@ -271,28 +505,52 @@ class SeisProcTester(QMainWindow):
             params = {k: v for k, v in pd.items() if k != 'method'}
             self.processing_label.setText(f"Processing: {fn} with " + ", ".join(f"{k}={v}" for k, v in params.items()))
             QApplication.processEvents()
-            try:
-                mod, fn = pd['method'].rsplit('.', 1)
-                func = getattr(importlib.import_module(mod), fn)
-                den = func(self.scaled_data, **params)
-            except Exception as e:
-                self.progress_bar.setVisible(False)
-                self.stop_button.setVisible(False)
-                self.param_combo.setEnabled(True)
-                self.processing_label.setVisible(False)
-                QMessageBox.critical(self, "Processing Error", f"Error during processing:\n{str(e)}")
-                return
-            inv = self.scaler.inverse_transform(den.reshape(-1,1)).reshape(den.shape)
-            real_list.append(inv)
+            started = time.monotonic()
+            status, payload = run_variant(
+                pd['method'], self.scaled_data, params,
+                timeout=self.variant_timeout, mem_limit_mb=self.variant_mem_limit,
+                on_tick=QApplication.processEvents,
+                should_stop=lambda: self.processing_stopped)
+            elapsed = time.monotonic() - started
+            if status == 'stopped':
+                break
             label = f"{i+1}: {fn} " + ", ".join(f"{k}={v}" for k, v in params.items())
+            if status == 'ok':
+                den = payload
+                inv = self.scaler.inverse_transform(den.reshape(-1,1)).reshape(den.shape)
+            else:
+                # Keep the slot so indices still match param_sets
+                inv = np.full_like(self.raw_data, np.nan)
+                self.variant_errors[i] = payload
+                label += f" [FAILED: {payload}]"
+            real_list.append(inv)
+            info = {
+                'params': pd, 'label': label, 'status': status,
+                'error': None if status == 'ok' else payload,
+                'elapsed': elapsed,
+                'metrics': variant_metrics(self.raw_data, inv) if status == 'ok' else {},
+            }
+            self.variant_info.append(info)
+            if stream:
+                try:
+                    append_variant(stream, i, inv if status == 'ok' else None, info)
+                except Exception as e:
+                    QMessageBox.warning(self, "Session Error", f"Streaming to session stopped:\n{str(e)}")
+                    stream = None
             self.param_combo.addItem(label)
             self.progress_bar.setValue(int((i+1)/total*100))
-        self.processed_real = np.array(real_list)
+        # Stopped before the first variant finished: nothing to show
+        self.processed_real = np.array(real_list) if real_list else None
         self.current_index = 0; self.param_combo.setCurrentIndex(0)
         self.progress_bar.setVisible(False); self.param_combo.setEnabled(True)
         self.stop_button.setVisible(False)
         self.processing_label.setVisible(False)
         self.update_images()
+        if stream:
+            try:
+                append_view(stream, self.view_state())
+            except Exception as e:
+                QMessageBox.warning(self, "Session Error", f"Could not save view state to session:\n{str(e)}")
 
     def save_figures(self):
         if self.raw_data is None or self.processed_real is None:
@@ -342,17 +600,22 @@ class SeisProcTester(QMainWindow):
                 axes[0].imshow(orig_disp, aspect='auto', cmap=cmap, vmin=vmin, vmax=vmax)
                 axes[0].set_title("Original")
 
-                # Processed
-                real = self.processed_real[idx]
-                den_disp = real.T
-                axes[1].imshow(den_disp, aspect='auto', cmap=cmap, vmin=vmin, vmax=vmax)
-                axes[1].set_title("Processed")
-
-                # Difference
-                diff = (self.raw_data - real).T
-                dvmin, dvmax = np.percentile(orig_disp, [gain, 100 - gain]) if gain > 0 else (orig_disp.min(), orig_disp.max())
-                axes[2].imshow(diff, aspect='auto', cmap=cmap, vmin=dvmin, vmax=dvmax)
-                axes[2].set_title("Difference")
+                if idx in self.variant_errors:
+                    # Failed variant: no image, mark the frame instead
+                    axes[1].set_title("Processed (failed)")
+                    axes[2].set_title(self.variant_errors[idx], fontsize=8)
+                else:
+                    # Processed
+                    real = self.processed_real[idx]
+                    den_disp = real.T
+                    axes[1].imshow(den_disp, aspect='auto', cmap=cmap, vmin=vmin, vmax=vmax)
+                    axes[1].set_title("Processed")
+
+                    # Difference
+                    diff = (self.raw_data - real).T
+                    dvmin, dvmax = np.percentile(orig_disp, [gain, 100 - gain]) if gain > 0 else (orig_disp.min(), orig_disp.max())
+                    axes[2].imshow(diff, aspect='auto', cmap=cmap, vmin=dvmin, vmax=dvmax)
+                    axes[2].set_title("Difference")
 
                 # Apply current zoom to all subplots
                 for i, ax in enumerate(axes):
@@ -459,7 +722,67 @@ class SeisProcTester(QMainWindow):
             self.canvas.draw()
             self.update_images()
 
+    def clip_levels(self, gain):
+        # Percentile clip of the original data, cached per gain value
+        if gain not in self._clip_cache:
+            self._clip_cache[gain] = tuple(np.percentile(self.raw_data, [gain, 100 - gain]))
+        return self._clip_cache[gain]
+
+    def toggle_fast_display(self, checked):
+        # Carry the zoom over to whichever view becomes visible
+        for i, ax in enumerate(self.ax):
+            if checked:
+                self.current_xlims[i] = ax.get_xlim()
+                self.current_ylims[i] = ax.get_ylim()
+            elif self.current_xlims[i] is not None:
+                ax.set_xlim(self.current_xlims[i])
+                ax.set_ylim(self.current_ylims[i])
+        self.fast_display = checked
+        self.canvas.setVisible(not checked)
+        self.fast_view.setVisible(checked)
+        self.update_images()
+
+    def on_fast_zoom(self, xlim, ylim):
+        self.current_xlims = [xlim] * 3
+        self.current_ylims = [ylim] * 3
+        self.update_images()
+
+    def on_fast_reset(self):
+        self.current_xlims = list(self.initial_xlims)
+        self.current_ylims = list(self.initial_ylims)
+        self.update_images()
+
+    def update_fast_images(self):
+        panels = self.fast_panels
+        if self.raw_data is None:
+            for panel, title in zip(panels, ("Original", "Processed (n/a)", "Difference (n/a)")):
+                panel.clear(title)
+            return
+        for i in range(3):
+            if self.current_xlims[i] is None or self.current_xlims[i] == (0.0, 1.0):
+                self.current_xlims[i] = self.initial_xlims[i]
+                self.current_ylims[i] = self.initial_ylims[i]
+        lut = colormap_lut(self.colormap_combo.currentText())
+        vmin, vmax = self.clip_levels(self.gain_input.value())
+        xlims, ylims = self.current_xlims, self.current_ylims
+        orig_disp = self.raw_data.T
+        panels[0].set_image(orig_disp, vmin, vmax, lut, xlims[0], ylims[0], "Original")
+        if self.processed_real is not None and self.current_index in self.variant_errors:
+            panels[1].clear("Processed (failed)")
+            panels[2].clear(self.variant_errors[self.current_index])
+        elif self.processed_real is not None:
+            den_disp = self.processed_real[self.current_index].T
+            panels[1].set_image(den_disp, vmin, vmax, lut, xlims[1], ylims[1], "Processed")
+            panels[2].set_image(orig_disp, vmin, vmax, lut, xlims[2], ylims[2], "Difference",
+                                subtract=den_disp)
+        else:
+            panels[1].clear("Processed (n/a)")
+            panels[2].clear("Difference (n/a)")
+
     def update_images(self):
+        if self.fast_display:
+            self.update_fast_images()
+            return
         for i in range(3):
             self.current_xlims[i] = self.ax[i].get_xlim()
             self.current_ylims[i] = self.ax[i].get_ylim()
@@ -468,24 +791,21 @@ class SeisProcTester(QMainWindow):
         self.ax[0].clear()
         if self.raw_data is not None:
             orig_disp = self.raw_data.T
-            vmin, vmax = np.percentile(orig_disp, [gain, 100 - gain])
+            vmin, vmax = self.clip_levels(gain)
             self.ax[0].imshow(orig_disp, aspect='auto', cmap=cmap, vmin=vmin, vmax=vmax)
         self.ax[0].set_title("Original")
         for a in self.ax[1:]:
             a.clear()
-        if self.processed_real is not None:
+        if self.processed_real is not None and self.current_index in self.variant_errors:
+            self.ax[1].set_title("Processed (failed)")
+            self.ax[2].set_title(self.variant_errors[self.current_index], fontsize=8)
+        elif self.processed_real is not None:
             real = self.processed_real[self.current_index]
             den_disp = real.T
-            vmin, vmax = np.percentile(orig_disp, [gain, 100 - gain])
             self.ax[1].imshow(den_disp, aspect='auto', cmap=cmap, vmin=vmin, vmax=vmax)
             self.ax[1].set_title("Processed")
             diff = (self.raw_data - real).T
-            if gain > 0:
-                dvmin = np.percentile(orig_disp, gain)
-                dvmax = np.percentile(orig_disp, 100 - gain)
-            else:
-                dvmin, dvmax = orig_disp.min(), orig_disp.max()
-            self.ax[2].imshow(diff, aspect='auto', cmap=cmap, vmin=dvmin, vmax=dvmax)
+            self.ax[2].imshow(diff, aspect='auto', cmap=cmap, vmin=vmin, vmax=vmax)
             self.ax[2].set_title("Difference")
         else:
             self.ax[1].set_title("Processed (n/a)")
@@ -503,6 +823,12 @@ class SeisProcTester(QMainWindow):
         if self.raw_data is None or self.processed_real is None:
             QMessageBox.warning(self, "Cannot Save", "Load & process before save.")
             return
+        if self.current_index in self.variant_errors:
+            QMessageBox.warning(self, "Cannot Save", "Selected variant failed, nothing to save.")
+            return
+        if not os.path.exists(self.last_opened_file):
+            QMessageBox.warning(self, "Cannot Save", f"Original SEG-Y not found:\n{self.last_opened_file}")
+            return
         path, _ = QFileDialog.getSaveFileName(self, "Save SEG-Y File", filter="SEG-Y Files (*.sgy *.segy)")
         if not path:
             return
@@ -518,7 +844,7 @@ class SeisProcTester(QMainWindow):
         if event.key() == Qt.Key_Return:
             if isinstance(focused_widget, QSpinBox):
                 super().keyPressEvent(event)
-            else:
+            elif not self.busy:
                 self.process_data()
             return
         if event.key() in (Qt.Key_Up, Qt.Key_Down):
@@ -536,17 +862,35 @@ class SeisProcTester(QMainWindow):
         else:
             super().keyPressEvent(event)
             return
-        self.current_index = new_idx
-        self.param_combo.setCurrentIndex(new_idx)
-        self.update_images()
+        # on_param_combo_changed redraws
+        if new_idx != self.current_index:
+            self.param_combo.setCurrentIndex(new_idx)
     
     def apply_to_folder(self):
-        # Убедимся, что есть наборы параметров и выбран какой-то из них
-        if not self.param_sets:
+        if self.busy:
+            return
+        self.set_busy(True)
+        try:
+            self.run_folder()
+        finally:
+            self.set_busy(False)
+
+    def run_folder(self):
+        # Убедимся, что есть наборы параметров
+        if not self.param_sets or self.param_combo.count() == 0:
             QMessageBox.warning(self, "Нет параметров", 
                                 "Сначала выполните Process, чтобы сгенерировать наборы параметров.")
             return
 
+        # Выбираем наборы параметров, по умолчанию - текущий
+        labels = [self.param_combo.itemText(i) for i in range(self.param_combo.count())]
+        dialog = VariantSelectDialog(labels, {self.current_index}, self)
+        if not dialog.exec_():
+            return
+        selected = dialog.selected()
+        if not selected:
+            return
+
         # Выбираем папку
         folder = QFileDialog.getExistingDirectory(self, "Select Folder with SEG-Y files")
         if not folder:
@@ -560,56 +904,78 @@ class SeisProcTester(QMainWindow):
                                     "В выбранной папке нет .sgy или .segy файлов.")
             return
 
-        # Берём текущий выбранный метод + параметры
-        pd = self.param_sets[self.current_index]
-        proc_name = pd['method'].split('.')[-1]
-        params = {k: v for k, v in pd.items() if k != 'method'}
-        suffix = "_".join(f"{k}{v}" for k, v in params.items())
-        subfolder_name = f"{proc_name}_{suffix}" if suffix else proc_name
-        out_dir = os.path.join(folder, subfolder_name)
-        os.makedirs(out_dir, exist_ok=True)
+        # Для каждого выбранного набора - свой метод, параметры и подпапка
+        variants = []
+        for index in selected:
+            pd = self.param_sets[index]
+            proc_name = pd['method'].split('.')[-1]
+            params = {k: v for k, v in pd.items() if k != 'method'}
+            suffix = "_".join(f"{k}{v}" for k, v in params.items())
+            subfolder_name = f"{proc_name}_{suffix}" if suffix else proc_name
+            out_dir = os.path.join(folder, subfolder_name)
+            os.makedirs(out_dir, exist_ok=True)
+            variants.append({'method': pd['method'], 'params': params,
+                             'name': subfolder_name, 'out_dir': out_dir})
 
         # Подготовка прогресса
-        total = len(files)
+        total = len(files) * len(variants)
         self.processing_stopped = False
         self.progress_bar.setVisible(True)
         self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(0)
         self.processing_label.setVisible(True)
-        self.processing_label.setText(f"Processing folder: {folder}, subfolder for results: {subfolder_name}")
         self.stop_button.setVisible(True)
         QApplication.processEvents()
 
-        # Обрабатываем каждый файл
+        # Каждый файл читается и масштабируется один раз; задачи (файл, набор)
+        # идут в общую очередь, следующий файл читается, когда освобождается
+        # рабочий процесс
         processed_count = 0
-        for idx, fname in enumerate(files, 1):
-            if self.processing_stopped:
-                break
-
-            src = os.path.join(folder, fname)
-            dst = os.path.join(out_dir, fname)
-            shutil.copyfile(src, dst)
-
-            try:
-                with segyio.open(dst, 'r+', ignore_geometry=True) as f:
-                    # читаем, масштабируем, обрабатываем и записываем обратно
-                    traces = f.trace.raw[:].T.astype(np.float32)
+        done = 0
+        failures = []
+        tasks = []  # (fname, src, scaler, variant) для каждой задачи по порядку
+
+        def folder_jobs():
+            nonlocal done
+            for fname in files:
+                src = os.path.join(folder, fname)
+                self.processing_label.setText(f"Processing folder: {folder}, file: {fname}, "
+                                              f"parameter sets: {len(variants)}")
+                try:
+                    with segyio.open(src, 'r', ignore_geometry=True) as f:
+                        traces = f.trace.raw[:].T.astype(np.float32)
                     scaler = MinMaxScaler().fit(traces.reshape(-1,1))
                     scaled = scaler.transform(traces.reshape(-1,1)).reshape(traces.shape)
-                    mod, fn = pd['method'].rsplit('.', 1)
-                    func = getattr(importlib.import_module(mod), fn)
-                    processed = func(scaled, **params)
-                    inv = scaler.inverse_transform(processed.reshape(-1,1)).reshape(processed.shape).T
-                    for i in range(inv.shape[0]):
-                        f.trace.raw[i] = inv[i]
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка обработки",
-                                     f"При обработке файла {fname} произошла ошибка:\n{e}")
-                break
-
-            processed_count += 1
-            self.progress_bar.setValue(idx)
-            QApplication.processEvents()
+                except Exception as e:
+                    failures.append(f"{fname}: {e}")
+                    done += len(variants)
+                    self.progress_bar.setValue(done)
+                    continue
+                for v in variants:
+                    tasks.append((fname, src, scaler, v))
+                    yield VariantJob(v['method'], scaled, v['params'],
+                                     self.variant_timeout, self.variant_mem_limit)
+
+        for k, status, payload in run_jobs(folder_jobs(), max_workers=os.cpu_count() or 1,
+                                           on_tick=QApplication.processEvents,
+                                           should_stop=lambda: self.processing_stopped):
+            fname, src, scaler, v = tasks[k]
+            if status == 'ok':
+                try:
+                    # копируем исходный файл ради заголовков и записываем трассы
+                    inv = scaler.inverse_transform(payload.reshape(-1,1)).reshape(payload.shape).T
+                    dst = os.path.join(v['out_dir'], fname)
+                    shutil.copyfile(src, dst)
+                    with segyio.open(dst, 'r+', ignore_geometry=True) as f:
+                        for i in range(inv.shape[0]):
+                            f.trace.raw[i] = inv[i]
+                    processed_count += 1
+                except Exception as e:
+                    failures.append(f"{fname} / {v['name']}: {e}")
+            else:
+                failures.append(f"{fname} / {v['name']}: {payload}")
+            done += 1
+            self.progress_bar.setValue(done)
 
         # Скрываем прогресс и stop-кнопку
         self.progress_bar.setVisible(False)
@@ -617,14 +983,21 @@ class SeisProcTester(QMainWindow):
         self.stop_button.setVisible(False)
 
         # Итоговое сообщение
+        errors = ""
+        if failures:
+            errors = "\nОшибки:\n" + "\n".join(failures[:10])
+            if len(failures) > 10:
+                errors += f"\n... и ещё {len(failures) - 10}"
+        counts = (f"Файлов: {len(files)}, наборов параметров: {len(variants)}\n"
+                  f"Записано результатов (файл × набор): {processed_count}/{total}")
         if self.processing_stopped:
             QMessageBox.information(self, "Остановлено",
-                                    f"Процесс был остановлен пользователем.\n"
-                                    f"Обработано файлов: {processed_count}/{total}")
+                                    f"Процесс был остановлен пользователем.\n{counts}{errors}")
         else:
+            out_dirs = "\n".join(v['out_dir'] for v in variants)
             QMessageBox.information(self, "Готово",
-                                    f"Обработано файлов: {processed_count}/{total}\n"
-                                    f"Результаты в папке:\n{out_dir}")
+                                    f"{counts}\n"
+                                    f"Результаты в папках:\n{out_dirs}{errors}")
 
 
 
@@ -0,0 +1,151 @@
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+
+# A session is a directory:
+#   manifest.json           input reference, scaler range, parameter grid
+#   input.npy               original traces
+#   variants/NNNN.npy       output of variant NNNN (absent if it failed)
+#   variants/NNNN.json      params, label, status, error, timing, metrics
+#   view/NNNN.json          display state, the last one wins
+# Every member is its own file, written under a temporary name and moved
+# into place, and a variant's .json goes in after its .npy. A running sweep
+# appends to the session and a crash mid-write loses only the variant being
+# written; earlier ones stay readable.
+
+SESSION_SUFFIX = '.spsession'
+SESSION_FILTER = "SeisProcTest Sessions (*.spsession)"
+SESSION_VERSION = 2
+
+MANIFEST = 'manifest.json'
+INPUT = 'input.npy'
+VARIANTS = 'variants'
+VIEW = 'view'
+
+
+def _replace(path, write):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _write_array(path, arr):
+    # float32 matches SEG-Y sample precision and halves the file size
+    _replace(path, lambda f: np.lib.format.write_array(
+        f, np.ascontiguousarray(arr, dtype=np.float32)))
+
+
+def _write_json(path, obj):
+    _replace(path, lambda f: f.write(json.dumps(obj, indent=2).encode()))
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def variant_metrics(raw, processed):
+    diff = raw - processed
+    rms_raw = float(np.sqrt(np.mean(raw ** 2)))
+    rms_diff = float(np.sqrt(np.mean(diff ** 2)))
+    return {
+        'rms_diff': rms_diff,
+        'diff_to_input': rms_diff / rms_raw if rms_raw > 0 else 0.0,
+    }
+
+
+def create_session(path, raw_data, source_path, params_text, param_sets):
+    """Start a new session at path, replacing an existing session there."""
+    if os.path.exists(path):
+        # Only ever delete something that looks like a (possibly half
+        # created) session
+        members = {MANIFEST, MANIFEST + '.tmp', INPUT, INPUT + '.tmp', VARIANTS, VIEW}
+        if not os.path.isdir(path) or not set(os.listdir(path)) <= members:
+            raise ValueError(f"Not a session directory: {path}")
+        shutil.rmtree(path)
+    os.makedirs(os.path.join(path, VARIANTS))
+    os.makedirs(os.path.join(path, VIEW))
+    _write_array(os.path.join(path, INPUT), raw_data)
+    # Manifest last: a directory without one is not a session
+    _write_json(os.path.join(path, MANIFEST), {
+        'version': SESSION_VERSION,
+        'source': source_path,
+        'shape': list(raw_data.shape),
+        'data_min': float(raw_data.min()),
+        'data_max': float(raw_data.max()),
+        'params': params_text,
+        'param_sets': param_sets,
+    })
+
+
+def append_variant(path, index, data, info):
+    """Add variant index to the session; data is None for a failed variant."""
+    base = os.path.join(path, VARIANTS, f'{index:04d}')
+    if data is not None:
+        _write_array(base + '.npy', data)
+    _write_json(base + '.json', info)
+
+
+def append_view(path, view):
+    view_dir = os.path.join(path, VIEW)
+    count = sum(1 for n in os.listdir(view_dir) if n.endswith('.json'))
+    _write_json(os.path.join(view_dir, f'{count:04d}.json'), view)
+
+
+class Session:
+    """Read side of a session directory. Variant arrays are read on request."""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest = _read_json(os.path.join(path, MANIFEST))
+        if self.manifest.get('version') != SESSION_VERSION:
+            raise ValueError(f"Unsupported session version: {self.manifest.get('version')}")
+        # Only variants whose record made it to disk count
+        variant_dir = os.path.join(path, VARIANTS)
+        self.variants = [_read_json(os.path.join(variant_dir, n))
+                         for n in sorted(os.listdir(variant_dir)) if n.endswith('.json')]
+        view_dir = os.path.join(path, VIEW)
+        views = sorted(n for n in os.listdir(view_dir) if n.endswith('.json'))
+        self.view = _read_json(os.path.join(view_dir, views[-1])) if views else {}
+
+    def load_input(self):
+        return np.load(os.path.join(self.path, INPUT)).astype(np.float64)
+
+    def load_variant(self, index):
+        if self.variants[index]['status'] != 'ok':
+            return np.full(self.manifest['shape'], np.nan, dtype=np.float32)
+        return np.load(os.path.join(self.path, VARIANTS, f'{index:04d}.npy'))
+
+    def close(self):
+        # Nothing is held open between reads
+        pass
+
+
+class LazyVariants:
+    """Stands in for the processed_real array: indexing loads the variant
+    from the session and keeps the most recently used ones in memory."""
+
+    def __init__(self, session, cache_size=8):
+        self.session = session
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.session.variants)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index in self._cache:
+            self._cache.move_to_end(index)
+        else:
+            self._cache[index] = self.session.load_variant(index)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return self._cache[index]
@@ -0,0 +1,157 @@
+import importlib
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def load_method(method):
+    mod, fn = method.rsplit('.', 1)
+    return getattr(importlib.import_module(mod), fn)
+
+
+def _address_space():
+    # Current virtual memory size of this process in bytes, None if unknown
+    if resource is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# The cap is relative to the inherited address space, so it needs both
+# RLIMIT_AS and a way to measure the starting size
+MEMORY_LIMIT_SUPPORTED = _address_space() is not None
+
+
+def _variant_main(conn, method, data, params, mem_limit_mb):
+    # Runs in the child process: cap the address space, call the method and
+    # send back ('ok', result) or ('failed', reason). The worker inherits the
+    # GUI's mappings (Qt, matplotlib, input data), so the cap is added on top
+    # of what is already mapped.
+    try:
+        if mem_limit_mb and MEMORY_LIMIT_SUPPORTED:
+            limit = _address_space() + int(mem_limit_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        result = np.asarray(load_method(method)(data, **params))
+        conn.send(('ok', result))
+    except MemoryError:
+        conn.send(('failed', f"memory limit exceeded ({mem_limit_mb} MB)"))
+    except Exception as e:
+        conn.send(('failed', str(e) or type(e).__name__))
+    finally:
+        conn.close()
+
+
+class VariantJob:
+    """One processing call running in its own worker process.
+
+    timeout is wall-clock seconds, mem_limit_mb caps how much virtual memory
+    the worker may allocate on top of what it inherits; 0 or None disables
+    the limit. The memory cap is ignored where MEMORY_LIMIT_SUPPORTED is false.
+    """
+
+    def __init__(self, method, data, params, timeout=None, mem_limit_mb=None):
+        self.method = method
+        self.data = data
+        self.params = params
+        self.timeout = timeout
+        self.mem_limit_mb = mem_limit_mb
+        self.process = None
+        self.conn = None
+        self.started = None
+
+    def start(self):
+        self.conn, child_conn = mp.Pipe(duplex=False)
+        self.process = mp.Process(
+            target=_variant_main,
+            args=(child_conn, self.method, self.data, self.params, self.mem_limit_mb),
+            daemon=True,
+        )
+        self.process.start()
+        # Drop our copy of the child end so a dead worker shows up as EOF
+        child_conn.close()
+        self.started = time.monotonic()
+
+    def poll(self):
+        """Return None while running, otherwise (status, payload)."""
+        if self.conn.poll():
+            try:
+                status, payload = self.conn.recv()
+            except EOFError:
+                self.process.join()
+                status, payload = 'failed', f"worker died (exit code {self.process.exitcode})"
+            self._finish()
+            return status, payload
+        if self.timeout and time.monotonic() - self.started > self.timeout:
+            self.kill()
+            return 'failed', f"timed out after {self.timeout} s"
+        return None
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        self._finish()
+
+    def _finish(self):
+        self.process.join()
+        self.conn.close()
+
+
+def run_jobs(jobs, max_workers=1, on_tick=None, should_stop=None, interval=0.05):
+    """Run VariantJobs with at most max_workers alive at a time.
+
+    jobs may be a lazy iterable; the next job is only taken when a worker
+    slot frees up. Yields (index, status, payload) as jobs finish. If
+    should_stop() turns true the running jobs are killed and the generator
+    returns early.
+    """
+    pending = enumerate(jobs)
+    exhausted = False
+    running = {}
+    try:
+        while not exhausted or running:
+            while not exhausted and len(running) < max_workers:
+                nxt = next(pending, None)
+                if nxt is None:
+                    exhausted = True
+                    break
+                i, job = nxt
+                job.start()
+                running[i] = job
+            for i, job in list(running.items()):
+                done = job.poll()
+                if done is not None:
+                    del running[i]
+                    yield (i,) + done
+            if should_stop is not None and should_stop():
+                return
+            if on_tick is not None:
+                on_tick()
+            time.sleep(interval)
+    finally:
+        # Also reached when the caller stops iterating early
+        for job in running.values():
+            job.kill()
+
+
+def run_variant(method, data, params, timeout=None, mem_limit_mb=None,
+                on_tick=None, should_stop=None, interval=0.05):
+    """Run method(data, **params) in an isolated worker and wait for it.
+
+    Returns ('ok', result), ('failed', reason) or ('stopped', None) if
+    should_stop() turned true. on_tick is called while waiting so the GUI
+    stays responsive.
+    """
+    job = VariantJob(method, data, params, timeout, mem_limit_mb)
+    for _, status, payload in run_jobs([job], on_tick=on_tick,
+                                       should_stop=should_stop, interval=interval):
+        return status, payload
+    return 'stopped', None